@@ -90,6 +90,8 @@ class CommonArgs(Tap):
     """Maximum number of data points to load."""
     num_workers: int = 8
     """Number of workers for the parallel data loading (0 means sequential)."""
+    featurization_workers: int = 1
+    """Number of processes used to generate :code:`features_generator` features when loading data (1 means sequential)."""
     batch_size: int = 50
     """Batch size."""
     atom_descriptors: Literal['feature', 'descriptor'] = None
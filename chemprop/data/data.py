@@ -1,5 +1,6 @@
 import threading
 from collections import OrderedDict
+from functools import lru_cache
 from random import Random
 from typing import Dict, Iterator, List, Optional, Union, Tuple
 
@@ -35,11 +36,28 @@ def empty_cache():
     SMILES_TO_MOL.clear()
 
 
+# Features generators whose features are all 0s and 1s
+BINARY_FEATURES_GENERATORS = {'morgan'}
+
 # Cache of RDKit molecules
 CACHE_MOL = True
 SMILES_TO_MOL: Dict[str, Union[Chem.Mol, Tuple[Chem.Mol, Chem.Mol]]] = {}
 
 
+@lru_cache(maxsize=None)
+def _features_generator_size(features_generator_name: str) -> int:
+    """
+    Returns the length of the features produced by a features generator.
+
+    Not all features are equally long, so methane is used as a dummy molecule to determine the length.
+    The length is computed once per features generator and then cached.
+
+    :param features_generator_name: The name of the features generator.
+    :return: The length of the features produced by the features generator.
+    """
+    return len(get_features_generator(features_generator_name)(Chem.MolFromSmiles('C')))
+
+
 def cache_mol() -> bool:
     r"""Returns whether RDKit molecules will be cached."""
     return CACHE_MOL
@@ -113,26 +131,27 @@ class MoleculeDatapoint:
 
         # Generate additional features if given a generator
         if self.features_generator is not None:
-            self.features = []
+            features = []
+            mols = self.mol
 
             for fg in self.features_generator:
                 features_generator = get_features_generator(fg)
-                for m, reaction in zip(self.mol, self.is_reaction_list):
+                for m, reaction in zip(mols, self.is_reaction_list):
                     if not reaction:
                         if m is not None and m.GetNumHeavyAtoms() > 0:
-                            self.features.extend(features_generator(m))
+                            features.append(features_generator(m))
                         # for H2
                         elif m is not None and m.GetNumHeavyAtoms() == 0:
                             # not all features are equally long, so use methane as dummy molecule to determine length
-                            self.features.extend(np.zeros(len(features_generator(Chem.MolFromSmiles('C')))))                           
+                            features.append(np.zeros(_features_generator_size(fg)))
                     else:
                         if m[0] is not None and m[1] is not None and m[0].GetNumHeavyAtoms() > 0:
-                            self.features.extend(features_generator(m[0]))
+                            features.append(features_generator(m[0]))
                         elif m[0] is not None and m[1] is not None and m[0].GetNumHeavyAtoms() == 0:
-                            self.features.extend(np.zeros(len(features_generator(Chem.MolFromSmiles('C')))))   
-                    
+                            features.append(np.zeros(_features_generator_size(fg)))
 
-            self.features = np.array(self.features)
+            # Concatenate into a single array in one allocation
+            self.features = np.concatenate(features) if len(features) > 0 else np.array([])
 
         # Fix nans in features
         replace_token = 0
@@ -151,6 +170,10 @@ class MoleculeDatapoint:
         if self.bond_features is not None:
             self.bond_features = np.where(np.isnan(self.bond_features), replace_token, self.bond_features)
 
+        # Binary fingerprints only need one byte per bit rather than eight as float64
+        if self.features_generator is not None and set(self.features_generator) <= BINARY_FEATURES_GENERATORS:
+            self.features = self.features.astype(np.uint8)
+
         # Save a copy of the raw features and targets to enable different scaling later on
         self.raw_features, self.raw_targets = self.features, self.targets
         self.raw_atom_descriptors, self.raw_atom_features, self.raw_bond_features = \
@@ -246,20 +269,30 @@ class MoleculeDataset(Dataset):
         :param data: A list of :class:`MoleculeDatapoint`\ s.
         """
         self._data = data
+        self._number_of_molecules = data[0].number_of_molecules if len(data) > 0 else None
+        self._num_tasks = None
         self._batch_graph = None
+        self._smiles = None
         self._random = Random()
 
     def smiles(self, flatten: bool = False) -> Union[List[str], List[List[str]]]:
         """
         Returns a list containing the SMILES list associated with each :class:`MoleculeDatapoint`.
 
+        .. note::
+           The list of lists of SMILES is cached after the first time it is computed and the same
+           list is returned upon subsequent calls, so it should not be modified.
+
         :param flatten: Whether to flatten the returned SMILES to a list instead of a list of lists.
         :return: A list of SMILES or a list of lists of SMILES, depending on :code:`flatten`.
         """
         if flatten:
             return [smiles for d in self._data for smiles in d.smiles]
 
-        return [d.smiles for d in self._data]
+        if self._smiles is None:
+            self._smiles = [d.smiles for d in self._data]
+
+        return self._smiles
 
     def mols(self, flatten: bool = False) -> Union[List[Chem.Mol], List[List[Chem.Mol]], List[Tuple[Chem.Mol, Chem.Mol]], List[List[Tuple[Chem.Mol, Chem.Mol]]]]:
         """
@@ -280,7 +313,7 @@ class MoleculeDataset(Dataset):
 
         :return: The number of molecules.
         """
-        return self._data[0].number_of_molecules if len(self._data) > 0 else None
+        return self._number_of_molecules
 
     def batch_graph(self) -> List[BatchMolGraph]:
         r"""
@@ -396,6 +429,17 @@ class MoleculeDataset(Dataset):
         """
         return [d.targets for d in self._data]
 
+    def targets_array(self) -> np.ndarray:
+        """
+        Returns the targets associated with each molecule as a single 2D array, with NaN for unknown targets.
+
+        This allows masks of known targets to be computed with :code:`~np.isnan(targets)` instead of checking
+        each target for None.
+
+        :return: A float32 numpy array of shape :code:`(len(dataset), num_tasks)` containing the targets.
+        """
+        return np.array(self.targets(), dtype=np.float32).reshape(len(self._data), self.num_tasks() or 0)
+
     def gt_targets(self) -> List[np.ndarray]:
         """
 
@@ -420,7 +464,11 @@ class MoleculeDataset(Dataset):
 
         :return: The number of tasks.
         """
-        return self._data[0].num_tasks() if len(self._data) > 0 else None
+        # Computed lazily since datapoints without targets (e.g., for prediction) have no number of tasks
+        if self._num_tasks is None and len(self._data) > 0:
+            self._num_tasks = self._data[0].num_tasks()
+
+        return self._num_tasks
 
     def features_size(self) -> int:
         """
@@ -483,6 +531,7 @@ class MoleculeDataset(Dataset):
                 (self._data[0].features is None and not scale_bond_features and not scale_atom_descriptors):
             return None
 
+        features = None
         if scaler is None:
             if scale_atom_descriptors and not self._data[0].atom_descriptors is None:
                 features = np.vstack([d.raw_atom_descriptors for d in self._data])
@@ -505,8 +554,14 @@ class MoleculeDataset(Dataset):
             for d in self._data:
                 d.set_bond_features(scaler.transform(d.raw_bond_features))
         else:
-            for d in self._data:
-                d.set_features(scaler.transform(d.raw_features.reshape(1, -1))[0])
+            if features is None:
+                features = np.vstack([d.raw_features for d in self._data])
+
+            # Scale all molecule features in one pass into a single contiguous float32 matrix
+            # (the model casts features to float32 anyway) and give each datapoint a view of its row
+            features = scaler.transform(features).astype(np.float32)
+            for d, d_features in zip(self._data, features):
+                d.set_features(d_features)
 
         return scaler
 
@@ -592,7 +647,7 @@ class MoleculeSampler(Sampler):
 
         if self.class_balance:
             indices = np.arange(len(dataset))
-            has_active = np.array([any(target == 1 for target in datapoint.targets) for datapoint in dataset])
+            has_active = (dataset.targets_array() == 1).any(axis=1)
 
             self.positive_indices = indices[has_active].tolist()
             self.negative_indices = indices[~has_active].tolist()
@@ -610,7 +665,10 @@ class MoleculeSampler(Sampler):
                 self._random.shuffle(self.positive_indices)
                 self._random.shuffle(self.negative_indices)
 
-            indices = [index for pair in zip(self.positive_indices, self.negative_indices) for index in pair]
+            # Interleave positives and negatives in one vectorized pass (truncated to the smaller class like zip)
+            num_pairs = self.length // 2
+            indices = np.column_stack((self.positive_indices[:num_pairs],
+                                       self.negative_indices[:num_pairs])).ravel().tolist()
         else:
             indices = list(range(len(self.dataset)))
 
@@ -1,19 +1,23 @@
 from collections import OrderedDict, defaultdict
 import csv
 from logging import Logger
+from multiprocessing import get_context
 import pickle
 from random import Random
-from typing import List, Set, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 import os
 
 from rdkit import Chem
 import numpy as np
+import pandas as pd
 from tqdm import tqdm
 
-from .data import MoleculeDatapoint, MoleculeDataset, make_mols
+from .data import cache_mol, MoleculeDatapoint, MoleculeDataset, make_mols, set_cache_mol, SMILES_TO_MOL
 from .scaffold import log_scaffold_stats, scaffold_split
 from chemprop.args import PredictArgs, TrainArgs
-from chemprop.features import load_features, load_valid_atom_or_bond_features, is_mol
+from chemprop.features import load_features, load_valid_atom_or_bond_features, is_mol, is_adding_hs, \
+    is_explicit_h, is_reaction, set_adding_hs, set_explicit_h, set_reaction
+from chemprop.features.featurization import reaction_mode
 
 def get_header(path: str) -> List[str]:
     """
@@ -223,6 +227,104 @@ def get_invalid_smiles_from_list(smiles: List[List[str]], reaction: bool = False
     return invalid_smiles
 
 
+# Keyword arguments for the datapoints built by a forked worker process
+_DATAPOINT_KWARGS: List[Dict[str, Any]] = []
+
+
+def _init_datapoint_worker(datapoint_kwargs: Optional[List[Dict[str, Any]]],
+                           featurization_settings: Tuple[bool, bool, bool, str],
+                           cache_mols: bool) -> None:
+    r"""
+    Initializes a worker process by applying the molecule settings of the parent process,
+    which a spawned worker does not inherit.
+
+    :param datapoint_kwargs: A list of keyword arguments, one per :class:`~chemprop.data.MoleculeDatapoint`,
+                             which a forked worker inherits without copying. None if each task carries
+                             its own keyword arguments.
+    :param featurization_settings: Whether to keep explicit hydrogens, whether to add hydrogens,
+                                   whether to use reactions, and the reaction mode.
+    :param cache_mols: Whether RDKit molecules are cached (and should therefore be returned to the parent).
+    """
+    global _DATAPOINT_KWARGS
+    if datapoint_kwargs is not None:
+        _DATAPOINT_KWARGS = datapoint_kwargs
+
+    explicit_h, adding_hs, reaction, mode = featurization_settings
+    set_explicit_h(explicit_h)
+    set_adding_hs(adding_hs)
+    set_reaction(reaction, mode)
+    set_cache_mol(cache_mols)
+
+
+def _build_datapoint(task: Union[int, Dict[str, Any]]) -> Tuple[MoleculeDatapoint, Optional[List[Union[Chem.Mol, Tuple[Chem.Mol, Chem.Mol]]]]]:
+    """
+    Builds a single :class:`~chemprop.data.MoleculeDatapoint` in a worker process.
+
+    Defined at the module level so that it can be sent to worker processes.
+
+    :param task: The index of the keyword arguments of this :class:`~chemprop.data.MoleculeDatapoint`
+                 in a forked worker, or the keyword arguments themselves otherwise.
+    :return: A tuple containing the :class:`~chemprop.data.MoleculeDatapoint` and its RDKit molecules
+             (or None if molecules are not cached) so that the parent process can cache them.
+    """
+    kwargs = _DATAPOINT_KWARGS[task] if isinstance(task, int) else task
+    datapoint = MoleculeDatapoint(**kwargs)
+
+    return datapoint, datapoint.mol if cache_mol() else None
+
+
+def _build_datapoints(datapoint_kwargs: List[Dict[str, Any]],
+                      n_jobs: int = 1) -> List[MoleculeDatapoint]:
+    r"""
+    Builds :class:`~chemprop.data.MoleculeDatapoint`\ s, in parallel when :code:`n_jobs > 1`.
+
+    Generating features (e.g., Morgan fingerprints) is a CPU-bound RDKit call per molecule,
+    so the datapoints can be built in a pool of worker processes using the platform's default start method.
+    When the workers are forked, they inherit the keyword arguments and only the index of each datapoint
+    is sent with each task. With other start methods (e.g., spawn), the keyword arguments of each datapoint
+    are pickled once, with its task. Either way, the finished datapoints are pickled back to the parent,
+    and the RDKit molecules parsed by the workers are added to the parent's molecule cache. Falls back to
+    building the datapoints sequentially if the pool cannot be created (e.g., due to ulimit restrictions).
+
+    :param datapoint_kwargs: A list of keyword arguments, one per :class:`~chemprop.data.MoleculeDatapoint`.
+    :param n_jobs: The number of processes to use (1 means sequential).
+    :return: A list of :class:`~chemprop.data.MoleculeDatapoint`\ s in the same order as :code:`datapoint_kwargs`.
+    """
+    processes = min(n_jobs, len(datapoint_kwargs))
+
+    pool = None
+    if processes > 1:
+        context = get_context()
+        forked = context.get_start_method() == 'fork'
+        featurization_settings = (is_explicit_h(is_mol=False), is_adding_hs(is_mol=True),
+                                  is_reaction(is_mol=False), reaction_mode())
+        try:
+            pool = context.Pool(processes=processes,
+                                initializer=_init_datapoint_worker,
+                                initargs=(datapoint_kwargs if forked else None, featurization_settings, cache_mol()))
+        except OSError:
+            pool = None
+
+    if pool is None:
+        return [MoleculeDatapoint(**kwargs)
+                for kwargs in tqdm(datapoint_kwargs, total=len(datapoint_kwargs))]
+
+    tasks = range(len(datapoint_kwargs)) if forked else datapoint_kwargs
+
+    # Large enough chunks to amortize inter-process communication, small enough to balance the load
+    chunksize = max(1, len(datapoint_kwargs) // (8 * processes))
+
+    data = []
+    with pool:
+        for datapoint, mols in tqdm(pool.imap(_build_datapoint, tasks, chunksize=chunksize),
+                                    total=len(datapoint_kwargs)):
+            if mols is not None:
+                SMILES_TO_MOL.update(zip(datapoint.smiles, mols))
+            data.append(datapoint)
+
+    return data
+
+
 def get_data(path: str,
              smiles_columns: Union[str, List[str]] = None,
              target_columns: List[str] = None,
@@ -239,7 +341,8 @@ def get_data(path: str,
              store_row: bool = False,
              logger: Logger = None,
              loss_function: str = None,
-             skip_none_targets: bool = False) -> MoleculeDataset:
+             skip_none_targets: bool = False,
+             n_jobs: int = None) -> MoleculeDataset:
     """
     Gets SMILES and target values from a CSV file.
 
@@ -265,6 +368,8 @@ def get_data(path: str,
     :param skip_none_targets: Whether to skip targets that are all 'None'. This is mostly relevant when --target_columns
                               are passed in, so only a subset of tasks are examined.
     :param loss_function: The loss function to be used in training.
+    :param n_jobs: The number of processes used to build the datapoints when a features generator is used.
+                   If provided, it is used in place of :code:`args.featurization_workers`. Defaults to 1 (sequential).
     :return: A :class:`~chemprop.data.MoleculeDataset` containing SMILES and target values along
              with other info such as additional features when desired.
     """
@@ -284,6 +389,7 @@ def get_data(path: str,
             else args.bond_features_path
         max_data_size = max_data_size if max_data_size is not None else args.max_data_size
         loss_function = loss_function if loss_function is not None else args.loss_function
+        n_jobs = n_jobs if n_jobs is not None else args.featurization_workers
 
     if not isinstance(smiles_columns, list):
         smiles_columns = preprocess_smiles_columns(path=path, smiles_columns=smiles_columns)
@@ -326,100 +432,96 @@ def get_data(path: str,
             ignore_columns=ignore_columns,
         )
 
-    # Find targets provided as inequalities
+    # Load data, keeping the raw strings so that missing and inequality targets can be identified.
+    # Unless rows may be skipped, only the first max_data_size rows can be kept, so only those are read.
+    nrows = int(max_data_size) if max_data_size < float('inf') and not skip_none_targets else None
+    # index_col=False keeps a trailing delimiter on each row from turning the first column into the index
+    data_df = pd.read_csv(path, dtype=str, keep_default_na=False, index_col=False, nrows=nrows).fillna('')
+
+    # Parse all targets at once, with missing targets ('' or 'nan') as NaN.
+    # Only the target block is converted to a fixed-width string array; the other columns stay as Python strings.
+    target_strings = data_df[target_columns].to_numpy(dtype=str)
+    target_values = np.char.strip(target_strings, '<>')
+    target_values = np.where(np.isin(target_values, ['', 'nan']), 'nan', target_values).astype(float)
+
+    # Check whether all targets are None and skip if so
+    indices = np.arange(len(data_df))
+    if skip_none_targets:
+        indices = indices[~np.all(np.isnan(target_values), axis=1)]
+
+    if len(indices) > max_data_size:
+        indices = indices[:int(max_data_size)]
+
+    # Find targets provided as inequalities in the rows that are kept
+    target_strings = target_strings[indices]
+    gt_mask = np.char.find(target_strings, '>') >= 0
+    lt_mask = np.char.find(target_strings, '<') >= 0
     if loss_function == 'bounded_mse':
-        gt_targets, lt_targets = get_inequality_targets(path=path, target_columns=target_columns)
+        if np.any(gt_mask & lt_mask):
+            raise ValueError(f'A target value in csv file {path} contains both ">" and "<" symbols. Inequality targets must be on one edge and not express a range.')
+        all_gt, all_lt = gt_mask.tolist(), lt_mask.tolist()
+    elif np.any(gt_mask | lt_mask):
+        raise ValueError('Inequality found in target data. To use inequality targets (> or <), the regression loss function bounded_mse must be used.')
     else:
-        gt_targets, lt_targets = None, None
+        all_gt, all_lt = None, None
 
-    # Load data
-    with open(path) as f:
-        reader = csv.DictReader(f)
-
-        all_smiles, all_targets, all_rows, all_features, all_phase_features, all_weights, all_gt, all_lt = [], [], [], [], [], [], [], []
-        for i, row in enumerate(tqdm(reader)):
-            smiles = [row[c] for c in smiles_columns]
-
-            targets = []
-            for column in target_columns:
-                value = row[column]
-                if value in ['','nan']:
-                    targets.append(None)
-                elif '>' in value or '<' in value:
-                    if loss_function == 'bounded_mse':
-                        targets.append(float(value.strip('<>')))
-                    else:
-                        raise ValueError('Inequality found in target data. To use inequality targets (> or <), the regression loss function bounded_mse must be used.')
-                else:
-                    targets.append(float(value))
-
-            # Check whether all targets are None and skip if so
-            if skip_none_targets and all(x is None for x in targets):
-                continue
-
-            all_smiles.append(smiles)
-            all_targets.append(targets)
-
-            if features_data is not None:
-                all_features.append(features_data[i])
-            
-            if phase_features is not None:
-                all_phase_features.append(phase_features[i])
-
-            if data_weights is not None:
-                all_weights.append(data_weights[i])
-
-            if gt_targets is not None:
-                all_gt.append(gt_targets[i])
-
-            if lt_targets is not None:
-                all_lt.append(lt_targets[i])
-
-            if store_row:
-                all_rows.append(row)
-
-            if len(all_smiles) >= max_data_size:
-                break
-
-        atom_features = None
-        atom_descriptors = None
-        if args is not None and args.atom_descriptors is not None:
-            try:
-                descriptors = load_valid_atom_or_bond_features(atom_descriptors_path, [x[0] for x in all_smiles])
-            except Exception as e:
-                raise ValueError(f'Failed to load or validate custom atomic descriptors or features: {e}')
-
-            if args.atom_descriptors == 'feature':
-                atom_features = descriptors
-            elif args.atom_descriptors == 'descriptor':
-                atom_descriptors = descriptors
-
-        bond_features = None
-        if args is not None and args.bond_features_path is not None:
-            try:
-                bond_features = load_valid_atom_or_bond_features(bond_features_path, [x[0] for x in all_smiles])
-            except Exception as e:
-                raise ValueError(f'Failed to load or validate custom bond features: {e}')
-
-        data = MoleculeDataset([
-            MoleculeDatapoint(
-                smiles=smiles,
-                targets=targets,
-                row=all_rows[i] if store_row else None,
-                data_weight=all_weights[i] if data_weights is not None else None,
-                gt_targets=all_gt[i] if gt_targets is not None else None,
-                lt_targets=all_lt[i] if lt_targets is not None else None,
-                features_generator=features_generator,
-                features=all_features[i] if features_data is not None else None,
-                phase_features=all_phase_features[i] if phase_features is not None else None,
-                atom_features=atom_features[i] if atom_features is not None else None,
-                atom_descriptors=atom_descriptors[i] if atom_descriptors is not None else None,
-                bond_features=bond_features[i] if bond_features is not None else None,
-                overwrite_default_atom_features=args.overwrite_default_atom_features if args is not None else False,
-                overwrite_default_bond_features=args.overwrite_default_bond_features if args is not None else False
-            ) for i, (smiles, targets) in tqdm(enumerate(zip(all_smiles, all_targets)),
-                                               total=len(all_smiles))
-        ])
+    all_smiles = data_df[smiles_columns].to_numpy()[indices].tolist()
+    all_targets = np.where(np.isnan(target_values), None, target_values)[indices].tolist()
+    all_features = features_data[indices] if features_data is not None else None
+    all_phase_features = phase_features[indices] if phase_features is not None else None
+    all_weights = [data_weights[i] for i in indices] if data_weights is not None else None
+
+    if store_row:
+        columns = data_df.columns.tolist()
+        all_rows = [OrderedDict(zip(columns, row)) for row in data_df.to_numpy()[indices].tolist()]
+
+    atom_features = None
+    atom_descriptors = None
+    if args is not None and args.atom_descriptors is not None:
+        try:
+            descriptors = load_valid_atom_or_bond_features(atom_descriptors_path, [x[0] for x in all_smiles])
+        except Exception as e:
+            raise ValueError(f'Failed to load or validate custom atomic descriptors or features: {e}')
+
+        if args.atom_descriptors == 'feature':
+            atom_features = descriptors
+        elif args.atom_descriptors == 'descriptor':
+            atom_descriptors = descriptors
+
+    bond_features = None
+    if args is not None and args.bond_features_path is not None:
+        try:
+            bond_features = load_valid_atom_or_bond_features(bond_features_path, [x[0] for x in all_smiles])
+        except Exception as e:
+            raise ValueError(f'Failed to load or validate custom bond features: {e}')
+
+    overwrite_default_atom_features = args.overwrite_default_atom_features if args is not None else False
+    overwrite_default_bond_features = args.overwrite_default_bond_features if args is not None else False
+
+    datapoint_kwargs = [
+        dict(
+            smiles=smiles,
+            targets=targets,
+            row=all_rows[i] if store_row else None,
+            data_weight=all_weights[i] if data_weights is not None else None,
+            gt_targets=all_gt[i] if all_gt is not None else None,
+            lt_targets=all_lt[i] if all_lt is not None else None,
+            features_generator=features_generator,
+            features=all_features[i] if features_data is not None else None,
+            phase_features=all_phase_features[i] if phase_features is not None else None,
+            atom_features=atom_features[i] if atom_features is not None else None,
+            atom_descriptors=atom_descriptors[i] if atom_descriptors is not None else None,
+            bond_features=bond_features[i] if bond_features is not None else None,
+            overwrite_default_atom_features=overwrite_default_atom_features,
+            overwrite_default_bond_features=overwrite_default_bond_features
+        ) for i, (smiles, targets) in enumerate(zip(all_smiles, all_targets))
+    ]
+
+    # Features generators are the only expensive part of building a datapoint
+    if features_generator is None or n_jobs is None:
+        n_jobs = 1
+
+    data = MoleculeDataset(_build_datapoints(datapoint_kwargs, n_jobs=n_jobs))
 
     # Filter out invalid SMILES
     if skip_invalid_smiles:
@@ -466,25 +568,6 @@ def get_data_from_smiles(smiles: List[List[str]],
     return data
 
 
-def get_inequality_targets(path: str, target_columns: List[str] = None) -> List[str]:
-    """
-
-    """
-    gt_targets = []
-    lt_targets = []
-
-    with open(path) as f:
-        reader = csv.DictReader(f)
-        for line in reader:
-            values = [line[col] for col in target_columns]
-            gt_targets.append(['>' in val for val in values])
-            lt_targets.append(['<' in val for val in values])
-            if any(['<' in val and '>' in val for val in values]):
-                raise ValueError(f'A target value in csv file {path} contains both ">" and "<" symbols. Inequality targets must be on one edge and not express a range.')
-
-    return gt_targets, lt_targets
-
-
 def split_data(data: MoleculeDataset,
                split_type: str = 'random',
                sizes: Tuple[float, float, float] = (0.8, 0.1, 0.1),
@@ -538,7 +621,8 @@ def split_data(data: MoleculeDataset,
 
         random = Random(0)
 
-        indices = np.repeat(np.arange(num_folds), 1 + len(data) // num_folds)[:len(data)]
+        # Shuffle a plain list of fold indices (same order as shuffling the array, without per-swap NumPy scalars)
+        indices = np.repeat(np.arange(num_folds), 1 + len(data) // num_folds)[:len(data)].tolist()
         random.shuffle(indices)
         test_index = seed % num_folds
         val_index = (seed + 1) % num_folds
@@ -656,17 +740,13 @@ def get_class_sizes(data: MoleculeDataset) -> List[List[float]]:
     :param data: A classification :class:`~chemprop.data.MoleculeDataset`.
     :return: A list of lists of class proportions. Each inner list contains the class proportions for a task.
     """
-    targets = data.targets()
-
-    # Filter out Nones
-    valid_targets = [[] for _ in range(data.num_tasks())]
-    for i in range(len(targets)):
-        for task_num in range(len(targets[i])):
-            if targets[i][task_num] is not None:
-                valid_targets[task_num].append(targets[i][task_num])
+    targets = data.targets_array()
 
     class_sizes = []
-    for task_targets in valid_targets:
+    for task_targets in targets.T:
+        # Filter out Nones
+        task_targets = task_targets[~np.isnan(task_targets)]
+
         if set(np.unique(task_targets)) > {0, 1}:
             raise ValueError('Classification dataset must only contains 0s and 1s.')
 
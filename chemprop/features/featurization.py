@@ -358,35 +358,31 @@ class MolGraph:
             for _ in range(self.n_atoms):
                 self.a2b.append([])
 
-            # Get bond features
-            for a1 in range(self.n_atoms):
-                for a2 in range(a1 + 1, self.n_atoms):
-                    bond = mol.GetBondBetweenAtoms(a1, a2)
-
-                    if bond is None:
-                        continue
-
-                    f_bond = bond_features(bond)
-                    if bond_features_extra is not None:
-                        descr = bond_features_extra[bond.GetIdx()].tolist()
-                        if overwrite_default_bond_features:
-                            f_bond = descr
-                        else:
-                            f_bond += descr
-
-                    self.f_bonds.append(self.f_atoms[a1] + f_bond)
-                    self.f_bonds.append(self.f_atoms[a2] + f_bond)
-
-                    # Update index mappings
-                    b1 = self.n_bonds
-                    b2 = b1 + 1
-                    self.a2b[a2].append(b1)  # b1 = a1 --> a2
-                    self.b2a.append(a1)
-                    self.a2b[a1].append(b2)  # b2 = a2 --> a1
-                    self.b2a.append(a2)
-                    self.b2revb.append(b2)
-                    self.b2revb.append(b1)
-                    self.n_bonds += 2
+            # Get bond features, ordered by atom pair (a1 < a2) without checking every pair of atoms for a bond
+            bond_pairs = sorted(((tuple(sorted((bond.GetBeginAtomIdx(), bond.GetEndAtomIdx()))), bond)
+                                 for bond in mol.GetBonds()), key=lambda pair: pair[0])
+            for (a1, a2), bond in bond_pairs:
+                f_bond = bond_features(bond)
+                if bond_features_extra is not None:
+                    descr = bond_features_extra[bond.GetIdx()].tolist()
+                    if overwrite_default_bond_features:
+                        f_bond = descr
+                    else:
+                        f_bond += descr
+
+                self.f_bonds.append(self.f_atoms[a1] + f_bond)
+                self.f_bonds.append(self.f_atoms[a2] + f_bond)
+
+                # Update index mappings
+                b1 = self.n_bonds
+                b2 = b1 + 1
+                self.a2b[a2].append(b1)  # b1 = a1 --> a2
+                self.b2a.append(a1)
+                self.a2b[a1].append(b2)  # b2 = a2 --> a1
+                self.b2a.append(a2)
+                self.b2revb.append(b2)
+                self.b2revb.append(b1)
+                self.n_bonds += 2
 
             if bond_features_extra is not None and len(bond_features_extra) != self.n_bonds / 2:
                 raise ValueError(f'The number of bonds in {Chem.MolToSmiles(mol)} is different from the length of '
@@ -527,15 +523,16 @@ class BatchMolGraph:
         # All start with zero padding so that indexing with zero padding returns zeros
         f_atoms = [[0] * self.atom_fdim]  # atom features
         f_bonds = [[0] * self.bond_fdim]  # combined atom/bond features
-        a2b = [[]]  # mapping from atom index to incoming bond indices
+        a2b_flat = []  # incoming bond indices of every atom, concatenated in atom order
+        a2b_counts = [0]  # number of incoming bonds of each atom (the padding atom has none)
         b2a = [0]  # mapping from bond index to the index of the atom the bond is coming from
         b2revb = [0]  # mapping from bond index to the index of the reverse bond
         for mol_graph in mol_graphs:
             f_atoms.extend(mol_graph.f_atoms)
             f_bonds.extend(mol_graph.f_bonds)
 
-            for a in range(mol_graph.n_atoms):
-                a2b.append([b + self.n_bonds for b in mol_graph.a2b[a]])
+            a2b_flat.extend(b + self.n_bonds for in_bonds in mol_graph.a2b for b in in_bonds)
+            a2b_counts.extend(len(in_bonds) for in_bonds in mol_graph.a2b)
 
             for b in range(mol_graph.n_bonds):
                 b2a.append(self.n_atoms + mol_graph.b2a[b])
@@ -546,12 +543,18 @@ class BatchMolGraph:
             self.n_atoms += mol_graph.n_atoms
             self.n_bonds += mol_graph.n_bonds
 
-        self.max_num_bonds = max(1, max(
-            len(in_bonds) for in_bonds in a2b))  # max with 1 to fix a crash in rare case of all single-heavy-atom mols
+        a2b_counts = np.array(a2b_counts, dtype=np.int64)
+        self.max_num_bonds = max(1, int(a2b_counts.max()))  # max with 1 to fix a crash in rare case of all single-heavy-atom mols
+
+        # Scatter the flat (CSR) incoming bond lists into a zero-padded num_atoms x max_num_bonds index
+        a2b_rows = np.repeat(np.arange(self.n_atoms), a2b_counts)
+        a2b_cols = np.arange(len(a2b_flat)) - np.repeat(np.cumsum(a2b_counts) - a2b_counts, a2b_counts)
+        a2b = np.zeros((self.n_atoms, self.max_num_bonds), dtype=np.int64)
+        a2b[a2b_rows, a2b_cols] = np.array(a2b_flat, dtype=np.int64)
 
         self.f_atoms = torch.FloatTensor(f_atoms)
         self.f_bonds = torch.FloatTensor(f_bonds)
-        self.a2b = torch.LongTensor([a2b[a] + [0] * (self.max_num_bonds - len(a2b[a])) for a in range(self.n_atoms)])
+        self.a2b = torch.from_numpy(a2b)
         self.b2a = torch.LongTensor(b2a)
         self.b2revb = torch.LongTensor(b2revb)
         self.b2b = None  # try to avoid computing b2b b/c O(n_atoms^3)
@@ -2,7 +2,6 @@ from logging import Logger
 import os
 import pickle
 from typing import Dict, List, Union
-from copy import deepcopy
 
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
@@ -75,7 +74,8 @@ def impute_sklearn(model: Union[RandomForestRegressor, RandomForestClassifier, S
     :return: A list of list of target values.
     """
     num_tasks = train_data.num_tasks()
-    new_targets=deepcopy(train_data.targets())
+    # Targets are immutable floats (or None), so copying each row is enough to protect the datapoints' targets
+    new_targets=[list(targets) for targets in train_data.targets()]
     
     if logger is not None:
         debug = logger.debug
@@ -1,6 +1,7 @@
 import logging
 from typing import Callable
 
+import numpy as np
 from tensorboardX import SummaryWriter
 import torch
 import torch.nn as nn
@@ -46,11 +47,11 @@ def train(model: MoleculeModel,
         # Prepare batch
         batch: MoleculeDataset
         mol_batch, features_batch, target_batch, atom_descriptors_batch, atom_features_batch, bond_features_batch, data_weights_batch = \
-            batch.batch_graph(), batch.features(), batch.targets(), batch.atom_descriptors(), \
+            batch.batch_graph(), batch.features(), batch.targets_array(), batch.atom_descriptors(), \
             batch.atom_features(), batch.bond_features(), batch.data_weights()
 
-        mask = torch.tensor([[x is not None for x in tb] for tb in target_batch], dtype=torch.bool) # shape(batch, tasks)
-        targets = torch.tensor([[0 if x is None else x for x in tb] for tb in target_batch]) # shape(batch, tasks)
+        mask = torch.from_numpy(~np.isnan(target_batch)) # shape(batch, tasks)
+        targets = torch.from_numpy(np.nan_to_num(target_batch, nan=0.0)) # shape(batch, tasks)
 
         if args.target_weights is not None:
             target_weights = torch.tensor(args.target_weights).unsqueeze(0) # shape(1,tasks)
@@ -7,7 +7,7 @@ from tempfile import TemporaryDirectory
 import numpy as np
 
 from chemprop.data import get_header, preprocess_smiles_columns, get_task_names, get_data_weights, \
-    get_smiles, filter_invalid_smiles, MoleculeDataset, MoleculeDatapoint, get_data, split_data
+    get_smiles, filter_invalid_smiles, MoleculeDataset, MoleculeDatapoint, get_data, split_data, get_class_sizes
 
 class TestGetHeader(TestCase):
     """
@@ -339,6 +339,66 @@ class TestGetData(TestCase):
         )
         self.assertEqual(data.targets(),[[0,1],[2,3],[4,5]])
 
+    def test_missing_targets(self):
+        """Testing that missing targets are loaded as None and all-None rows can be skipped"""
+        path = os.path.join(self.temp_dir.name,'missing.csv')
+        with open(path,'w') as f:
+            f.write('column0,column1,column2,column3\nC,CC,0,\nCC,CN,nan,\nO,CO,4,5')
+        data = get_data(
+            path=path
+        )
+        self.assertEqual(data.targets(),[[0,None],[None,None],[4,5]])
+        data = get_data(
+            path=path,
+            skip_none_targets=True
+        )
+        self.assertEqual(data.smiles(),[['C','CC'],['O','CO']])
+
+    def test_inequality_targets(self):
+        """Testing that inequality targets are parsed into values and gt/lt masks with bounded_mse"""
+        data = get_data(
+            path=os.path.join('tests','data','regression_inequality.csv'),
+            smiles_columns=['smiles'],
+            target_columns=['logSolubility'],
+            skip_invalid_smiles=False,
+            loss_function='bounded_mse',
+        )
+        self.assertEqual(data[0].targets,[-0.77])
+        self.assertEqual((data[0].gt_targets,data[0].lt_targets),([False],[True]))
+        self.assertEqual(data[50].targets,[-3.66])
+        self.assertEqual((data[50].gt_targets,data[50].lt_targets),([True],[False]))
+
+    def test_inequality_without_bounded_mse(self):
+        """Testing that inequality targets require the bounded_mse loss function"""
+        with self.assertRaises(ValueError):
+            get_data(
+                path=os.path.join('tests','data','regression_inequality.csv'),
+                smiles_columns=['smiles'],
+                target_columns=['logSolubility'],
+            )
+
+    def test_inequality_range(self):
+        """Testing that a target with both inequality symbols raises an error"""
+        path = os.path.join(self.temp_dir.name,'range.csv')
+        with open(path,'w') as f:
+            f.write('column0,column1,column2,column3\nC,CC,0,1\nCC,CN,<2>,3')
+        with self.assertRaises(ValueError):
+            get_data(
+                path=path,
+                loss_function='bounded_mse',
+            )
+
+    def test_inequality_after_max_data_size(self):
+        """Testing that rows after max_data_size are not validated"""
+        path = os.path.join(self.temp_dir.name,'late_inequality.csv')
+        with open(path,'w') as f:
+            f.write('column0,column1,column2,column3\nC,CC,0,1\nCC,CN,2,3\nO,CO,<4,5')
+        data = get_data(
+            path=path,
+            max_data_size=2,
+        )
+        self.assertEqual(data.targets(),[[0,1],[2,3]])
+
     @patch(
         "chemprop.data.utils.load_features",
         lambda *args, **kwargs : np.array([[0,1],[2,3],[4,5]])
@@ -365,6 +425,21 @@ class TestGetData(TestCase):
         print(data.features())
         self.assertTrue(np.array_equal(data.features(),[[0,1,0,1],[2,3,2,3],[4,5,4,5]]))
 
+    def test_features_generator_parallel(self):
+        """Testing that building datapoints in parallel matches building them sequentially"""
+        sequential_data = get_data(
+            path=self.data_path,
+            features_generator=['morgan'],
+            n_jobs=1,
+        )
+        parallel_data = get_data(
+            path=self.data_path,
+            features_generator=['morgan'],
+            n_jobs=2,
+        )
+        self.assertEqual(parallel_data.smiles(), sequential_data.smiles())
+        self.assertTrue(np.array_equal(parallel_data.features(), sequential_data.features()))
+
     def test_dataweights(self):
         """Testing the handling of data weights"""
         data = get_data(
@@ -478,3 +553,27 @@ class TestSplitData(TestCase):
         )
         self.assertEqual(test.smiles(),[['CO', 'CCCO'], ['CO', 'CCO']])
 
+
+
+class TestGetClassSizes(TestCase):
+    """
+    Tests for the get_class_sizes function.
+    """
+    def test_missing_targets(self):
+        """Testing that missing targets are ignored"""
+        dataset = MoleculeDataset([
+            MoleculeDatapoint(['C'], targets=[1, 0]),
+            MoleculeDatapoint(['CC'], targets=[0, None]),
+            MoleculeDatapoint(['CN'], targets=[None, 1]),
+            MoleculeDatapoint(['O'], targets=[0, 1]),
+        ])
+        class_sizes = get_class_sizes(dataset)
+        np.testing.assert_allclose(class_sizes, [[2 / 3, 1 / 3], [1 / 3, 2 / 3]])
+
+    def test_non_binary(self):
+        """Testing that targets with a class beyond 0s and 1s raise an error"""
+        dataset = MoleculeDataset([MoleculeDatapoint(['C'], targets=[2]), MoleculeDatapoint(['CC'], targets=[0]),
+                                   MoleculeDatapoint(['CN'], targets=[1])])
+        with self.assertRaises(ValueError):
+            get_class_sizes(dataset)
+